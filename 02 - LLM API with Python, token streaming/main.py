@@ -1,11 +1,15 @@
-from openai import OpenAI
+import os
+import sys
 
-client = OpenAI()
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.openai_client import get_client
+
+client = get_client()
 
 with open("lesson-1-transcript.txt", "r") as file:
     transcript = file.read()
 
-completion = client.chat.completions.create(
+completion = client.chat_completion(
     model="gpt-4o-mini",
     max_tokens=4096,
     messages=[
@@ -1,20 +1,23 @@
-import openai
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.openai_client import get_client
 
 def generate_images(prompt, num_images=9):
     """Generates images using OpenAI's DALL·E API."""
-    openai.api_key = "YOUR_OPENAI_API_KEY" 
+    client = get_client()
     
     images = []
     for i in range(num_images):
         print(f"Generating image {i+1}...")
-        response = openai.Image.create(
+        response = client.generate_image(
             prompt=f"{prompt} - variation {i+1}", 
             n=1,
             size="1024x1024"
         )
         
-        image_url = response["data"][0]["url"]
+        image_url = response.data[0].url
         images.append(image_url)
         save_image(image_url, f"image_{i+1}.png")
         
@@ -1,39 +1,158 @@
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.indexes import VectorstoreIndexCreator
-from langchain_community.chat_models import ChatOpenAI
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain.indexes import VectorstoreIndexCreator
 from dotenv import load_dotenv
 import os
-from typing import List, Optional
+import sys
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import FrozenSet, List, Optional, Tuple
 from langchain.docstore.document import Document
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.openai_client import get_chat_model, get_embeddings
+
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
-llm = ChatOpenAI()
+
+# Same wording as LangChain's default "stuff" QA prompt used by index.query
+QA_PROMPT = """Use the following pieces of context to answer the question at the end. If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+{context}
+
+Question: {question}
+Helpful Answer:"""
+
+_KEY_TERM = re.compile(r'"[^"]+"|(?<!\w)\'[^\']+\'(?!\w)|\b\w*\d\w*\b|\b[A-Z][\w-]*\b')
+# Capitalized only because they start a sentence (or are "I"); never entities
+_NON_KEY_TERMS = frozenset("""
+    a an the i is are was were be do does did can could should would will may might must
+    what which who whom whose when where why how please tell show give list name find
+    compare explain describe summarize according based in on at for of to and or if
+    there this that these those it its my our your we you they
+""".split())
+
+class AnswerCache:
+    """Two-tier LRU cache of answers: exact question match, then semantic match."""
+
+    def __init__(self, max_size: int = 256, similarity_threshold: float = 0.95):
+        """
+        Initialize the answer cache.
+
+        Args:
+            max_size (int): Maximum number of entries kept in each tier
+            similarity_threshold (float): Minimum cosine similarity for a semantic hit.
+                Questions that differ in a single entity ("price of X" / "price of Y")
+                commonly score above 0.9 with OpenAI embeddings, so semantic hits also
+                require identical key terms (see key_terms); raise the threshold if
+                lowercase, unquoted entities are common in your questions.
+        """
+        self.max_size = max_size
+        self.similarity_threshold = similarity_threshold
+        self._exact: "OrderedDict[str, str]" = OrderedDict()
+        self._semantic: "OrderedDict[str, Tuple[List[float], float, FrozenSet[str], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.index_version = None
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        """Lowercase and collapse whitespace so trivially different questions match."""
+        return " ".join(question.lower().split()).rstrip("?!. ")
+
+    @staticmethod
+    def key_terms(question: str) -> FrozenSet[str]:
+        """Numbers, quoted strings and capitalized words in a question, minus stop words.
+
+        A semantic hit is only allowed when these match exactly, so a cached answer
+        about one entity is not served for a question about another.
+        """
+        terms = (term.strip("\"'").lower() for term in _KEY_TERM.findall(question))
+        return frozenset(term for term in terms if term not in _NON_KEY_TERMS)
+
+    def ensure_version(self, index_version: int):
+        """Drop every entry if the underlying index has changed."""
+        with self._lock:
+            if self.index_version != index_version:
+                self._exact.clear()
+                self._semantic.clear()
+                self.index_version = index_version
+
+    def get_exact(self, key: str) -> Optional[str]:
+        with self._lock:
+            answer = self._exact.get(key)
+            if answer is not None:
+                self._exact.move_to_end(key)
+            return answer
+
+    def get_semantic(self, embedding: List[float], terms: FrozenSet[str]) -> Optional[str]:
+        norm = math.sqrt(sum(x * x for x in embedding))
+        if not norm:
+            return None
+        with self._lock:
+            best_key, best_score = None, self.similarity_threshold
+            for key, (vector, vector_norm, cached_terms, _) in self._semantic.items():
+                if cached_terms != terms:
+                    continue
+                score = sum(a * b for a, b in zip(embedding, vector)) / (norm * vector_norm)
+                if score >= best_score:
+                    best_key, best_score = key, score
+            if best_key is None:
+                return None
+            self._semantic.move_to_end(best_key)
+            return self._semantic[best_key][3]
+
+    def put(self, key: str, answer: str, embedding: Optional[List[float]] = None,
+            terms: FrozenSet[str] = frozenset()):
+        with self._lock:
+            self._exact[key] = answer
+            self._exact.move_to_end(key)
+            if len(self._exact) > self.max_size:
+                self._exact.popitem(last=False)
+
+            if embedding:
+                norm = math.sqrt(sum(x * x for x in embedding))
+                if norm:
+                    self._semantic[key] = (embedding, norm, terms, answer)
+                    self._semantic.move_to_end(key)
+                    if len(self._semantic) > self.max_size:
+                        self._semantic.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._exact.clear()
+            self._semantic.clear()
 
 class PDFChatBot:
     """A class to handle PDF document loading and querying."""
     
-    def __init__(self, pdf_path: str, api_key: Optional[str] = None):
+    def __init__(self, pdf_path: str, api_key: Optional[str] = None,
+                 cache_size: int = 256, similarity_threshold: float = 0.95):
         """
         Initialize the PDF chatbot.
         
         Args:
             pdf_path (str): Path to the PDF file
             api_key (str, optional): OpenAI API key
+            cache_size (int): Maximum number of cached answers per cache tier
+            similarity_threshold (float): Cosine similarity above which a
+                previously answered question is reused
         """
         self.pdf_path = pdf_path
         self.index = None
         self.chat_model = None
+        self.embeddings = None
+        self.index_version = 0
+        self.cache = AnswerCache(max_size=cache_size, similarity_threshold=similarity_threshold)
         
         try:
             # Initialize chat model
-            self.chat_model = ChatOpenAI(
+            self.chat_model = get_chat_model(
                 api_key=api_key or os.getenv("OPENAI_API_KEY"),
                 temperature=0.7,
                 model_name="gpt-3.5-turbo"
             )
+            self.embeddings = get_embeddings(api_key=api_key or os.getenv("OPENAI_API_KEY"))
 
             # Load and index documents
             self._load_and_index()
@@ -56,12 +175,18 @@ class PDFChatBot:
                 raise ValueError("No content could be extracted from the PDF")
                 
             # Create index
-            self.index = VectorstoreIndexCreator().from_documents(docs)
+            self.index = VectorstoreIndexCreator(embedding=self.embeddings).from_documents(docs)
+            self.index_version += 1
             
         except Exception as e:
             print(f"Error loading/indexing PDF: {str(e)}")
             raise
 
+    def reload(self):
+        """Re-index the PDF, e.g. after the file changed; clears cached answers."""
+        self._load_and_index()
+        self.cache.ensure_version(self.index_version)
+
     def query(self, question: str) -> str:
         """
         Query the PDF document with a question.
@@ -75,14 +200,49 @@ class PDFChatBot:
         try:
             if not question.strip():
                 raise ValueError("Query cannot be empty")
-                
-            response = self.index.query(question, llm=self.chat_model)
+
+            # Any re-index invalidates previously cached answers
+            self.cache.ensure_version(self.index_version)
+            key = self.cache.normalize(question)
+            cached = self.cache.get_exact(key)
+            if cached is not None:
+                return cached
+
+            # One embedding serves both the semantic cache and retrieval
+            embedding = self._embed_question(question)
+            terms = self.cache.key_terms(question)
+            if embedding:
+                cached = self.cache.get_semantic(embedding, terms)
+                if cached is not None:
+                    self.cache.put(key, cached)
+                    return cached
+                response = self._answer(question, embedding)
+            else:
+                response = self.index.query(question, llm=self.chat_model)
+
+            if response:
+                self.cache.put(key, response, embedding, terms)
             return response or "No response generated"
             
         except Exception as e:
             print(f"Error processing query: {str(e)}")
             return f"Error: {str(e)}"
 
+    def _answer(self, question: str, embedding: List[float], k: int = 4) -> str:
+        """Retrieve with an already computed question embedding and answer from the context."""
+        docs = self.index.vectorstore.similarity_search_by_vector(embedding, k=k)
+        context = "\n\n".join(doc.page_content for doc in docs)
+        message = self.chat_model.invoke(QA_PROMPT.format(context=context, question=question))
+        return message.content
+
+    def _embed_question(self, question: str) -> Optional[List[float]]:
+        """Embed a question; on failure the semantic tier is skipped and index.query embeds it."""
+        try:
+            return self.embeddings.embed_query(question.strip())
+        except Exception as e:
+            print(f"Error embedding query for cache: {str(e)}")
+            return None
+
 if __name__ == "__main__":
     try:
         pdf_path = "docs/burgers.pdf"
@@ -1,10 +1,14 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
+import sys
 import logging
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.logging_setup import setup_logging
+
 # Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+setup_logging()
 logger = logging.getLogger(__name__)
 
 def create_histogram(csv_path="data/dataset.csv", 
@@ -26,7 +30,7 @@ def create_histogram(csv_path="data/dataset.csv",
             raise FileNotFoundError(f"CSV file not found at: {csv_path}")
 
         # Load CSV file
-        logger.info(f"Loading CSV file from {csv_path}")
+        logger.info("Loading CSV file from %s", csv_path)
         df = pd.read_csv(csv_path)
 
         # Verify column exists and is numeric
@@ -57,7 +61,7 @@ def create_histogram(csv_path="data/dataset.csv",
         plt.grid(True, alpha=0.3)
 
         # Save the plot
-        logger.info(f"Saving histogram to {output_path}")
+        logger.info("Saving histogram to %s", output_path)
         plt.savefig(output_path, dpi=300, bbox_inches='tight')
         plt.show()
         plt.close()
@@ -65,7 +69,7 @@ def create_histogram(csv_path="data/dataset.csv",
         logger.info("Histogram created successfully")
         
     except Exception as e:
-        logger.error(f"Error creating histogram: {str(e)}")
+        logger.error("Error creating histogram: %s", e)
         raise
 
 if __name__ == "__main__":
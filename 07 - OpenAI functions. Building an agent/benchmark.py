@@ -0,0 +1,370 @@
+import sqlite3
+import json
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+JOB_TITLES = [
+    "Transit Operator", "Special Nurse", "Registered Nurse", "Firefighter", "Police Officer",
+    "Custodian", "Deputy Sheriff", "Recreation Leader", "Public Service Trainee", "Attorney",
+    "General Laborer", "Senior Clerk", "Engineer", "Parking Control Officer", "Librarian"
+]
+AGENCIES = ["San Francisco", "Oakland", "San Jose"]
+STATUSES = ["FT", "PT", ""]
+YEARS = [2011, 2012, 2013, 2014]
+
+# Each question maps to the tool-call steps the mock model will issue, one list of SQL per step
+SCRIPTED_QUESTIONS: Dict[str, List[List[str]]] = {
+    "What is the average total pay per year?": [
+        ["SELECT Year, AVG(TotalPay) AS AvgTotalPay FROM Salaries GROUP BY Year"]
+    ],
+    "Who are the 10 highest paid employees in 2014?": [
+        ["SELECT EmployeeName, JobTitle, TotalPay FROM Salaries WHERE Year = 2014 "
+         "ORDER BY TotalPay DESC LIMIT 10"]
+    ],
+    "Compare average pay of firefighters and police officers in 2013": [
+        ["SELECT AVG(TotalPay) FROM Salaries WHERE JobTitle = 'Firefighter' AND Year = 2013",
+         "SELECT AVG(TotalPay) FROM Salaries WHERE JobTitle = 'Police Officer' AND Year = 2013"]
+    ],
+    "How much overtime was paid per agency and status?": [
+        ["SELECT Agency, Status, SUM(OvertimePay) FROM Salaries GROUP BY Agency, Status"]
+    ],
+    "Which job title earns the most, and how did its pay change over the years?": [
+        ["SELECT JobTitle, AVG(TotalPay) AS AvgPay FROM Salaries GROUP BY JobTitle "
+         "ORDER BY AvgPay DESC LIMIT 1"],
+        ["SELECT Year, AVG(TotalPay) FROM Salaries WHERE JobTitle = 'Attorney' GROUP BY Year"]
+    ],
+    "Show me all salaries": [
+        ["SELECT * FROM Salaries"]
+    ]
+}
+
+# Present only in databases made by generate_database, which is what allows overwriting them
+BENCHMARK_MARKER_TABLE = "BenchmarkGenerated"
+
+def is_benchmark_database(path: str) -> bool:
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (BENCHMARK_MARKER_TABLE,)
+            ).fetchone() is not None
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+
+def generate_database(path: str, rows: int, seed: int = 42, batch_size: int = 50000, force: bool = False):
+    """Create a synthetic Salaries table with the same schema as the real dataset.
+
+    An existing file is only replaced if the benchmark generated it, or with `force`.
+    """
+    if os.path.exists(path):
+        if not force and not is_benchmark_database(path):
+            raise FileExistsError(
+                f"{path} was not generated by the benchmark; use another --workdir or pass --force"
+            )
+        os.remove(path)
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("""
+        CREATE TABLE "Salaries" (
+            "Id" INTEGER, "EmployeeName" TEXT, "JobTitle" TEXT, "BasePay" NUMERIC,
+            "OvertimePay" NUMERIC, "OtherPay" NUMERIC, "Benefits" NUMERIC, "TotalPay" NUMERIC,
+            "TotalPayBenefits" NUMERIC, "Year" INTEGER, "Notes" TEXT, "Agency" TEXT,
+            "Status" TEXT, PRIMARY KEY("Id")
+        )
+    """)
+    conn.execute(f'CREATE TABLE "{BENCHMARK_MARKER_TABLE}" (rows INTEGER, seed INTEGER)')
+    conn.execute(f'INSERT INTO "{BENCHMARK_MARKER_TABLE}" VALUES (?, ?)', (rows, seed))
+    conn.commit()
+
+    def make_rows(start: int, stop: int):
+        for i in range(start, stop):
+            base = round(rng.uniform(20000, 250000), 2)
+            overtime = round(rng.uniform(0, 40000) if rng.random() < 0.4 else 0.0, 2)
+            other = round(rng.uniform(0, 10000), 2)
+            benefits = round(base * rng.uniform(0.15, 0.35), 2)
+            total = round(base + overtime + other, 2)
+            yield (
+                i + 1, f"EMPLOYEE {i + 1}", rng.choice(JOB_TITLES), base, overtime, other,
+                benefits, total, round(total + benefits, 2), rng.choice(YEARS), None,
+                rng.choice(AGENCIES), rng.choice(STATUSES)
+            )
+
+    started = time.perf_counter()
+    for start in range(0, rows, batch_size):
+        conn.executemany(
+            'INSERT INTO "Salaries" VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            make_rows(start, min(start + batch_size, rows))
+        )
+        conn.commit()
+    conn.close()
+    logging.info("Generated %d rows in %s in %.1fs", rows, path, time.perf_counter() - started)
+
+class MockChatCompletionsHandler(BaseHTTPRequestHandler):
+    """Minimal /chat/completions endpoint that replays SCRIPTED_QUESTIONS as tool calls."""
+
+    latency = 0.0
+    rate_limit_every = 0
+    retry_after = 0.05
+    requests_seen = 0
+    counter_lock = threading.Lock()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with self.counter_lock:
+            type(self).requests_seen += 1
+            throttle = self.rate_limit_every and type(self).requests_seen % self.rate_limit_every == 0
+        if throttle:
+            # Exercise the shared client's Retry-After handling
+            payload = json.dumps({"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}}).encode()
+            self.send_response(429)
+            self.send_header("Retry-After", str(self.retry_after))
+        else:
+            if self.latency:
+                time.sleep(self.latency)
+            payload = json.dumps(self._reply(body)).encode()
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _reply(self, body: dict) -> dict:
+        messages = body.get("messages", [])
+        question = next((m["content"] for m in messages if m.get("role") == "user"), "")
+        steps = SCRIPTED_QUESTIONS.get(question, [])
+        step = sum(1 for m in messages if m.get("role") == "assistant" and m.get("tool_calls"))
+        prompt_chars = sum(len(m.get("content") or "") for m in messages)
+
+        if step < len(steps) and body.get("tool_choice") != "none":
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": f"call_{step}_{i}",
+                        "type": "function",
+                        "function": {"name": "execute_sql_query", "arguments": json.dumps({"query": sql})}
+                    }
+                    for i, sql in enumerate(steps[step])
+                ]
+            }
+            finish_reason = "tool_calls"
+        else:
+            tool_results = sum(1 for m in messages if m.get("role") == "tool")
+            message = {"role": "assistant", "content": f"Answered using {tool_results} query result(s)."}
+            finish_reason = "stop"
+
+        return {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": 20,
+                "total_tokens": prompt_chars // 4 + 20
+            }
+        }
+
+def start_mock_server(latency: float = 0.0, rate_limit_every: int = 0) -> ThreadingHTTPServer:
+    handler = type("Handler", (MockChatCompletionsHandler,), {
+        "latency": latency,
+        "rate_limit_every": rate_limit_every,
+        "counter_lock": threading.Lock()
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+class StageTimer:
+    """Collects wall-clock samples per stage across all benchmark threads."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples[stage].append(seconds * 1000)
+
+    def wrap(self, stage: str, func):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started)
+        return timed
+
+def instrument(agent, timer: StageTimer):
+    """Patch the agent module so LLM wait, SQL execution and serialization are timed separately.
+
+    Row formatting runs inside execute_sql_query, so its time is subtracted from
+    the query sample; queries answered from the result cache get their own stage.
+    """
+    agent.client.chat_completion = timer.wrap("llm_wait", agent.client.chat_completion)
+    serialized = threading.local()
+
+    def timed_serialize(func):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                serialized.seconds = getattr(serialized, "seconds", 0.0) + elapsed
+                timer.add("serialization", elapsed)
+        return timed
+
+    execute_sql_query = agent.execute_sql_query
+
+    def timed_execute(*args, **kwargs):
+        serialized.seconds = 0.0
+        started = time.perf_counter()
+        stage = "sql_execution"
+        try:
+            result = execute_sql_query(*args, **kwargs)
+            if result.cached:
+                stage = "sql_cache_hit"
+            return result
+        finally:
+            timer.add(stage, time.perf_counter() - started - serialized.seconds)
+
+    agent._serialize_batch = timed_serialize(agent._serialize_batch)
+    agent.QueryResult.to_tsv = timed_serialize(agent.QueryResult.to_tsv)
+    agent.execute_sql_query = timed_execute
+
+def report(timer: StageTimer, wall: float, requests: int, errors: int) -> dict:
+    summary = {
+        "requests": requests,
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(requests / wall, 2) if wall else 0.0,
+        "stages": {}
+    }
+    print(f"\n{requests} requests in {wall:.2f}s ({summary['throughput_rps']} req/s), {errors} errors")
+    print(f"{'stage':<16}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    for stage in ["end_to_end", "llm_wait", "sql_execution", "sql_cache_hit", "serialization"]:
+        values = timer.samples.get(stage, [])
+        stats = {
+            "count": len(values),
+            "mean": sum(values) / len(values) if values else 0.0,
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99)
+        }
+        summary["stages"][stage] = {key: round(value, 3) for key, value in stats.items()}
+        print(
+            f"{stage:<16}{stats['count']:>8}{stats['mean']:>10.2f}{stats['p50']:>10.2f}"
+            f"{stats['p95']:>10.2f}{stats['p99']:>10.2f}"
+        )
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark get_agent_response against a mock OpenAI server")
+    parser.add_argument("--rows", type=int, default=100000, help="synthetic Salaries rows (1e5-1e7)")
+    parser.add_argument("--workdir", default="benchmark_data", help="where database.sqlite is generated")
+    parser.add_argument("--reuse-db", action="store_true", help="keep an existing generated database")
+    parser.add_argument("--force", action="store_true",
+                        help="overwrite database.sqlite in --workdir even if the benchmark did not create it")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5, help="times the question set is asked")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated model latency")
+    parser.add_argument("--mock-429-every", type=int, default=0,
+                        help="answer every Nth model request with 429 and Retry-After")
+    parser.add_argument("--no-cache", action="store_true", help="disable the SQL result cache")
+    parser.add_argument("--no-explain", action="store_true", help="skip EXPLAIN QUERY PLAN logging")
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    agent_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.dirname(agent_dir))
+    from common.logging_setup import setup_logging
+    setup_logging(json_format=False)
+    workdir = os.path.abspath(args.workdir)
+    json_path = os.path.abspath(args.json) if args.json else None
+    os.makedirs(workdir, exist_ok=True)
+    database = os.path.join(workdir, "database.sqlite")
+    if not (args.reuse_db and os.path.exists(database)):
+        try:
+            generate_database(database, args.rows, force=args.force)
+        except FileExistsError as e:
+            parser.error(str(e))
+
+    server = start_mock_server(args.llm_latency_ms / 1000, args.mock_429_every)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    if args.no_cache:
+        os.environ["SQL_RESULT_CACHE_ENTRIES"] = "0"
+    if args.no_explain:
+        os.environ["SQL_EXPLAIN_QUERIES"] = "0"
+    os.environ.setdefault("SQLITE_POOL_SIZE", str(max(args.concurrency, 4)))
+
+    # The agent resolves database.sqlite relative to the working directory
+    os.chdir(workdir)
+    sys.path.insert(0, agent_dir)
+    import main as agent
+    logging.getLogger().setLevel(logging.WARNING)
+
+    timer = StageTimer()
+    instrument(agent, timer)
+    questions = list(SCRIPTED_QUESTIONS) * args.repeat
+    errors = 0
+
+    def ask(question: str) -> bool:
+        started = time.perf_counter()
+        answer = agent.get_agent_response(question)
+        timer.add("end_to_end", time.perf_counter() - started)
+        return not answer.startswith("An error occurred")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for ok in executor.map(ask, questions):
+            errors += 0 if ok else 1
+    wall = time.perf_counter() - started
+    server.shutdown()
+
+    summary = report(timer, wall, len(questions), errors)
+    summary.update({
+        "rows": args.rows,
+        "concurrency": args.concurrency,
+        "openai_usage": agent.client.usage.summary()
+    })
+    print(f"OpenAI client: {summary['openai_usage']}")
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    main()
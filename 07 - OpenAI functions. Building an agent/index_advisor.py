@@ -0,0 +1,345 @@
+import sqlite3
+import json
+import os
+import re
+import sys
+import logging
+import argparse
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+SALARIES_COLUMNS = [
+    "Id", "EmployeeName", "JobTitle", "BasePay", "OvertimePay", "OtherPay", "Benefits",
+    "TotalPay", "TotalPayBenefits", "Year", "Notes", "Agency", "Status"
+]
+_COLUMN_BY_NAME = {name.lower(): name for name in SALARIES_COLUMNS}
+MAX_INDEX_COLUMNS = 6
+
+# Precomputed aggregates for the questions the agent is asked most often
+SUMMARY_TABLES = {
+    "SalaryStatsByJobTitleYear": """
+        SELECT JobTitle, Year,
+               COUNT(*) AS Employees,
+               AVG(BasePay) AS AvgBasePay,
+               AVG(TotalPay) AS AvgTotalPay,
+               MIN(TotalPay) AS MinTotalPay,
+               MAX(TotalPay) AS MaxTotalPay,
+               SUM(TotalPayBenefits) AS SumTotalPayBenefits
+        FROM Salaries
+        GROUP BY JobTitle, Year
+    """,
+    "SalaryStatsByAgencyYearStatus": """
+        SELECT Agency, Year, Status,
+               COUNT(*) AS Employees,
+               AVG(TotalPay) AS AvgTotalPay,
+               MAX(TotalPay) AS MaxTotalPay,
+               SUM(TotalPay) AS SumTotalPay,
+               SUM(OvertimePay) AS SumOvertimePay
+        FROM Salaries
+        GROUP BY Agency, Year, Status
+    """
+}
+
+_CLAUSE_END = re.compile(r"\b(?:where|group by|order by|having|limit|union|except|intersect|window)\b")
+_EQUALITY = re.compile(r'"?(\w+)"?\s*(?:=|\bin\b|\bis\b)', re.S)
+_RANGE = re.compile(r'"?(\w+)"?\s*(?:<|>|\bbetween\b|\blike\b)', re.S)
+_IDENTIFIER = re.compile(r'"?(\w+)"?')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_TABLE_ALIAS = re.compile(r'\b"?salaries"?(?:\s+as)?\s+"?(\w+)"?')
+_PLAN_SCAN = re.compile(r"SCAN (?:TABLE )?(\w+)(?: AS (\w+))?")
+_NOT_ALIASES = {
+    "where", "group", "order", "limit", "join", "inner", "left", "right", "full", "cross",
+    "natural", "on", "using", "union", "except", "intersect", "having", "window", "indexed", "not"
+}
+
+def _columns(pattern: re.Pattern, text: str) -> List[str]:
+    found = []
+    for name in pattern.findall(text):
+        column = _COLUMN_BY_NAME.get(name.lower())
+        if column and column not in found:
+            found.append(column)
+    return found
+
+def _clauses(sql: str, keyword: str) -> List[str]:
+    """Text of each `keyword` clause at its own nesting level.
+
+    Parenthesized groups inside the clause are reduced to "()" and the clause ends at
+    the next clause keyword or at the parenthesis closing the enclosing group.
+    """
+    depths = []
+    depth = 0
+    for char in sql:
+        if char == ")":
+            depth -= 1
+        depths.append(depth)
+        if char == "(":
+            depth += 1
+
+    clauses = []
+    for match in re.finditer(rf"\b{keyword}\b", sql):
+        level = depths[match.start()]
+        chars = []
+        for i in range(match.end(), len(sql)):
+            if depths[i] < level:
+                break
+            if depths[i] == level:
+                chars.append(sql[i])
+        text = "".join(chars)
+        end = _CLAUSE_END.search(text)
+        clauses.append(text[:end.start()] if end else text)
+    return clauses
+
+def analyze_query(query: str) -> Dict[str, List[str]]:
+    """Roughly classify the Salaries columns a query filters, groups and reads."""
+    sql = " ".join(_STRING_LITERAL.sub("?", query).lower().split())
+    where = " ".join(_clauses(sql, "where"))
+    group_by = " ".join(_clauses(sql, "group by"))
+    order_by = " ".join(_clauses(sql, "order by"))
+    equality = _columns(_EQUALITY, where)
+    return {
+        "equality": equality,
+        "range": [c for c in _columns(_RANGE, where) if c not in equality],
+        "group_by": _columns(_IDENTIFIER, group_by),
+        "order_by": _columns(_IDENTIFIER, order_by),
+        "referenced": _columns(_IDENTIFIER, sql)
+    }
+
+def candidate_index(analysis: Dict[str, List[str]]) -> Optional[Tuple[str, ...]]:
+    """Equality filters first, then grouping, then one range column, then covered payload."""
+    key: List[str] = []
+    for column in analysis["equality"] + analysis["group_by"] + analysis["range"][:1]:
+        if column not in key:
+            key.append(column)
+    if not key:
+        return None
+    for column in analysis["referenced"]:
+        if column not in key and column != "Id" and len(key) < MAX_INDEX_COLUMNS:
+            key.append(column)
+    return tuple(key)
+
+def table_names(query: str, table: str = "Salaries") -> set:
+    """The table name plus every alias the query gives it, lowercased."""
+    sql = _STRING_LITERAL.sub("?", query).lower()
+    names = {table.lower()}
+    names.update(
+        alias for alias in _TABLE_ALIAS.findall(sql.replace(f'"{table.lower()}"', table.lower()))
+        if alias not in _NOT_ALIASES
+    )
+    return names
+
+def is_full_scan(plan: List[str], query: str = "", table: str = "Salaries") -> bool:
+    names = table_names(query, table)
+    for detail in plan:
+        match = _PLAN_SCAN.match(detail)
+        if not match or "INDEX" in detail:
+            continue
+        if {name.lower() for name in match.groups() if name} & names:
+            return True
+    return False
+
+class IndexAdvisor:
+    """Logs query plans, flags full scans and turns the observed workload into index proposals."""
+
+    def __init__(self, workload_file: str = "index_advisor_workload.json"):
+        self.workload_file = workload_file
+        self.workload: Counter = Counter()
+        self.full_scans = 0
+        self.queries = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def explain(self, conn: sqlite3.Connection, query: str) -> List[str]:
+        try:
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}")]
+        except sqlite3.Error as e:
+            logging.warning("EXPLAIN QUERY PLAN failed: %s", e)
+            return []
+        self.record(query, plan)
+        return plan
+
+    def record(self, query: str, plan: List[str]):
+        full_scan = is_full_scan(plan, query)
+        logging.info("Query plan: %s", " | ".join(plan))
+        if full_scan:
+            logging.warning("Full scan of Salaries for query: %s", query)
+        candidate = candidate_index(analyze_query(query)) if full_scan else None
+        with self._lock:
+            self.queries += 1
+            if full_scan:
+                self.full_scans += 1
+            if candidate:
+                self.workload[candidate] += 1
+
+    def recommend(self, conn: Optional[sqlite3.Connection] = None,
+                  min_count: int = 2) -> List[str]:
+        existing = existing_indexes(conn) if conn is not None else []
+        with self._lock:
+            candidates = [key for key, count in self.workload.most_common() if count >= min_count]
+        # Widest first, so a narrower shape that is a prefix of it is not proposed separately
+        candidates.sort(key=len, reverse=True)
+        statements = []
+        for key in candidates:
+            # Only an index that starts with every candidate column already covers it
+            if any(index[:len(key)] == key for index in existing):
+                continue
+            existing.append(key)
+            name = "idx_salaries_" + "_".join(column.lower() for column in key)
+            columns = ", ".join(f'"{column}"' for column in key)
+            statements.append(f'CREATE INDEX IF NOT EXISTS {name} ON "Salaries" ({columns})')
+        return statements
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "full_scans": self.full_scans,
+                "candidate_indexes": len(self.workload)
+            }
+
+    def load(self):
+        if not os.path.exists(self.workload_file):
+            return
+        try:
+            with open(self.workload_file, "r") as f:
+                data = json.load(f)
+            for item in data:
+                self.workload[tuple(item["columns"])] += item["count"]
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning("Could not load index workload: %s", e)
+
+    def save(self):
+        with self._lock:
+            data = [{"columns": list(key), "count": count} for key, count in self.workload.items()]
+        with open(self.workload_file, "w") as f:
+            json.dump(data, f, indent=2)
+
+def existing_indexes(conn: sqlite3.Connection, table: str = "Salaries") -> List[Tuple[str, ...]]:
+    indexes = []
+    for row in conn.execute(f'PRAGMA index_list("{table}")'):
+        columns = tuple(info[2] for info in conn.execute(f'PRAGMA index_info("{row[1]}")'))
+        indexes.append(columns)
+    return indexes
+
+SUMMARY_BUILD_TABLE = "SummaryTableBuild"
+_STALE_TRIGGERS = {
+    f"summary_stale_after_{event.lower()}": event for event in ("INSERT", "UPDATE", "DELETE")
+}
+
+def refresh_summary_tables(conn: sqlite3.Connection):
+    """Rebuild every summary table from Salaries in a single transaction.
+
+    Triggers on Salaries flag the build as stale on any later write, so the agent
+    stops advertising the tables until they are rebuilt.
+    """
+    with conn:
+        conn.execute(
+            f'CREATE TABLE IF NOT EXISTS "{SUMMARY_BUILD_TABLE}" '
+            '(name TEXT PRIMARY KEY, built_at TEXT NOT NULL, stale INTEGER NOT NULL DEFAULT 0)'
+        )
+        for name, select in SUMMARY_TABLES.items():
+            conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+            conn.execute(f'CREATE TABLE "{name}" AS {select}')
+            conn.execute(
+                f'INSERT OR REPLACE INTO "{SUMMARY_BUILD_TABLE}" VALUES (?, datetime(\'now\'), 0)',
+                (name,)
+            )
+        for trigger, event in _STALE_TRIGGERS.items():
+            conn.execute(
+                f'CREATE TRIGGER IF NOT EXISTS "{trigger}" AFTER {event} ON "Salaries" '
+                f'BEGIN UPDATE "{SUMMARY_BUILD_TABLE}" SET stale = 1 WHERE stale = 0; END'
+            )
+    logging.info("Refreshed summary tables: %s", ", ".join(SUMMARY_TABLES))
+
+def fresh_summary_tables(conn: sqlite3.Connection) -> Dict[str, str]:
+    """Summary tables built since the last write to Salaries, mapped to their build time."""
+    objects = {
+        name: kind for name, kind in conn.execute(
+            "SELECT name, type FROM sqlite_master WHERE type IN ('table', 'trigger')"
+        )
+    }
+    if SUMMARY_BUILD_TABLE not in objects:
+        return {}
+    # Without the triggers (e.g. Salaries was recreated) staleness cannot be tracked
+    if any(objects.get(trigger) != "trigger" for trigger in _STALE_TRIGGERS):
+        logging.warning("Summary table triggers missing; not advertising summary tables")
+        return {}
+    fresh = {}
+    for name, built_at, stale in conn.execute(
+        f'SELECT name, built_at, stale FROM "{SUMMARY_BUILD_TABLE}"'
+    ):
+        if name not in SUMMARY_TABLES or objects.get(name) != "table":
+            continue
+        if stale:
+            logging.warning("Summary table %s is stale (Salaries changed since %s)", name, built_at)
+            continue
+        fresh[name] = built_at
+    return fresh
+
+def refresh_stale_summary_tables(conn: sqlite3.Connection) -> bool:
+    """Rebuild the summary tables if they were built before but are no longer fresh.
+
+    Databases that never had summary tables are left alone; returns whether a rebuild ran.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SUMMARY_BUILD_TABLE,)
+    ).fetchone()
+    if not exists or set(fresh_summary_tables(conn)) == set(SUMMARY_TABLES):
+        return False
+    refresh_summary_tables(conn)
+    return True
+
+def describe_summary_tables(conn: sqlite3.Connection) -> str:
+    """Schema text for the up-to-date summary tables, for inclusion in the system prompt."""
+    fresh = fresh_summary_tables(conn)
+    if not fresh:
+        return ""
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name IN (%s)"
+        % ", ".join("?" for _ in fresh),
+        list(fresh)
+    ).fetchall()
+    schemas = "\n".join(f"{sql};" for _, sql in sorted(rows))
+    return (
+        "\nPRECOMPUTED SUMMARY TABLES (prefer these over Salaries for per-group statistics; "
+        f"built from Salaries at {min(fresh.values())} UTC; Salaries has not changed since):\n" + schemas + "\n"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Propose or create indexes for the Salaries table")
+    parser.add_argument("--database", default="database.sqlite")
+    parser.add_argument("--workload", default="index_advisor_workload.json")
+    parser.add_argument("--min-count", type=int, default=2)
+    parser.add_argument("--apply", action="store_true", help="create the proposed indexes")
+    parser.add_argument("--summaries", action="store_true",
+                        help="build (or force a rebuild of) the summary tables")
+    parser.add_argument("--keep-stale-summaries", action="store_true",
+                        help="do not rebuild summary tables invalidated by writes to Salaries")
+    args = parser.parse_args()
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from common.logging_setup import setup_logging
+    setup_logging(json_format=False)
+    advisor = IndexAdvisor(args.workload)
+    conn = sqlite3.connect(args.database)
+    try:
+        statements = advisor.recommend(conn, min_count=args.min_count)
+        if not statements:
+            print("No new indexes recommended.")
+        for statement in statements:
+            print(f"{statement};")
+            if args.apply:
+                conn.execute(statement)
+        if args.apply and statements:
+            conn.execute('ANALYZE "Salaries"')
+            conn.commit()
+            logging.info("Created %d index(es)", len(statements))
+        if args.summaries:
+            refresh_summary_tables(conn)
+        elif not args.keep_stale_summaries:
+            refresh_stale_summary_tables(conn)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
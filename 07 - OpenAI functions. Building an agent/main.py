@@ -1,38 +1,455 @@
 import sqlite3
-from openai import OpenAI
 from pydantic import BaseModel, Field
 from openai import pydantic_function_tool
 import json
 import os
+import sys
 import logging
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
 from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from index_advisor import IndexAdvisor, describe_summary_tables, refresh_stale_summary_tables
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.openai_client import DeadlineExceeded, get_client
+from common.logging_setup import setup_logging
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f'agent_logs_{datetime.now().strftime("%Y%m%d")}.log'),
-        logging.StreamHandler()
-    ]
-)
+# Initialize the shared, rate-limited OpenAI client
+client = get_client(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Set up logging; records are written by a background thread off the request path
+setup_logging(log_file=f'agent_logs_{datetime.now().strftime("%Y%m%d")}.log')
+
+DATABASE_PATH = 'database.sqlite'
+MAX_RESULT_ROWS = int(os.getenv("SQL_MAX_RESULT_ROWS", "200"))
+MAX_RESULT_BYTES = int(os.getenv("SQL_MAX_RESULT_BYTES", "16000"))
+FETCH_BATCH_SIZE = 100
+# SQLite VM instructions between deadline checks while a query runs
+PROGRESS_CHECK_INTERVAL = 10000
+RESULT_CACHE_ENTRIES = int(os.getenv("SQL_RESULT_CACHE_ENTRIES", "128"))
+RESULT_CACHE_BYTES = int(os.getenv("SQL_RESULT_CACHE_BYTES", str(8 * 1024 * 1024)))
+EXPLAIN_QUERIES = os.getenv("SQL_EXPLAIN_QUERIES", "1") == "1"
+REFRESH_STALE_SUMMARIES = os.getenv("SQL_REFRESH_STALE_SUMMARIES", "1") == "1"
+AGENT_MAX_STEPS = int(os.getenv("AGENT_MAX_STEPS", "5"))
+AGENT_TIME_BUDGET = float(os.getenv("AGENT_TIME_BUDGET_SECONDS", "60"))
+# Share of the budget kept back so the final answer call always has time left
+AGENT_FINAL_RESERVE = float(os.getenv("AGENT_FINAL_RESERVE_SECONDS", "15"))
+
+# SQLITE_IOERR, SQLITE_CORRUPT, SQLITE_CANTOPEN and SQLITE_NOTADB: the connection itself is unusable
+_CONNECTION_ERROR_CODES = {10, 11, 14, 26}
+
+def _is_connection_error(error: sqlite3.DatabaseError) -> bool:
+    """True when a connection should be dropped rather than returned to the pool.
+
+    Statement-level failures (bad SQL, writes on the read-only connection, an
+    interrupted query) leave the connection and its caches perfectly usable.
+    """
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xff in _CONNECTION_ERROR_CODES
+    return not isinstance(error, (sqlite3.OperationalError, sqlite3.ProgrammingError,
+                                  sqlite3.IntegrityError, sqlite3.DataError))
+
+class SQLiteConnectionPool:
+    """Thread-safe pool of read-only SQLite connections reused across agent turns."""
+
+    def __init__(self, database: str, size: int = 4, mmap_size: int = 256 * 1024 * 1024,
+                 cache_size_kb: int = 64 * 1024, timeout: float = 30.0):
+        self.database = database
+        self.size = size
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._in_use = 0
+        self._generation = 0
+        self._conn_generation: Dict[sqlite3.Connection, int] = {}
+        self._recycles = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._queries = 0
+        self._query_seconds = 0.0
+        self._max_query_seconds = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"file:{self.database}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=256
+        )
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        # Negative cache_size is in KiB rather than pages
+        conn.execute(f"PRAGMA cache_size = {-int(self.cache_size_kb)}")
+        with self._lock:
+            self._conn_generation[conn] = self._generation
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = None
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._opened < self.size:
+                    self._opened += 1
+                    opening = True
+                else:
+                    self._waits += 1
+                    opening = False
+            if opening:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No SQLite connection available after {self.timeout}s")
+        if conn is None:
+            # A discarded connection left its slot free
+            try:
+                conn = self._connect()
+            except Exception:
+                self._idle.put(None)
+                raise
+
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+        discard = False
+        try:
+            yield conn
+        except sqlite3.DatabaseError as e:
+            discard = _is_connection_error(e)
+            raise
+        finally:
+            # Never return a connection holding an open read transaction to the pool
+            if not discard and conn.in_transaction:
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    discard = True
+            with self._lock:
+                self._in_use -= 1
+                # Opened before a recycle: it may still point at a replaced database file
+                if self._conn_generation.get(conn) != self._generation:
+                    discard = True
+            if discard:
+                self._discard(conn)
+            else:
+                self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection):
+        with self._lock:
+            self._conn_generation.pop(conn, None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._idle.put(None)
+
+    def recycle(self):
+        """Close idle connections and retire checked-out ones when they are returned."""
+        with self._lock:
+            self._generation += 1
+            self._recycles += 1
+        idle = []
+        while True:
+            try:
+                idle.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for conn in idle:
+            if conn is None:
+                self._idle.put(None)
+            else:
+                self._discard(conn)
+
+    def record_query(self, elapsed: float):
+        with self._lock:
+            self._queries += 1
+            self._query_seconds += elapsed
+            self._max_query_seconds = max(self._max_query_seconds, elapsed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "opened": self._opened,
+                "in_use": self._in_use,
+                "utilization": self._in_use / self.size if self.size else 0.0,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "recycles": self._recycles,
+                "queries": self._queries,
+                "avg_query_ms": (self._query_seconds / self._queries * 1000) if self._queries else 0.0,
+                "max_query_ms": self._max_query_seconds * 1000
+            }
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if conn is not None:
+                conn.close()
+            with self._lock:
+                self._opened -= 1
+
+db_pool = SQLiteConnectionPool(DATABASE_PATH, size=int(os.getenv("SQLITE_POOL_SIZE", "4")))
+
+NULL_MARKER = "\\N"
+
+def _format_cell(value) -> str:
+    """Lossless cell text: NULL is \\N, floats keep full precision, text escapes \\, tab and newline."""
+    if value is None:
+        return NULL_MARKER
+    if isinstance(value, float):
+        return format(value, ".15g")
+    if isinstance(value, bytes):
+        return value.hex()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\r", "\\r")
+        .replace("\n", "\\n")
+    )
+
+def _serialize_batch(batch: List[tuple]) -> List[str]:
+    return ["\t".join(_format_cell(value) for value in row) for row in batch]
+
+@dataclass
+class QueryResult:
+    columns: List[str]
+    rows: List[str] = field(default_factory=list)
+    truncated: bool = False
+    elapsed_ms: float = 0.0
+    cached: bool = False
+
+    @property
+    def row_count(self) -> int:
+        return len(self.rows)
+
+    def to_tsv(self) -> str:
+        """Serialize as tab-separated rows under a single header line."""
+        summary = f"# rows={self.row_count} elapsed_ms={self.elapsed_ms:.1f} null={NULL_MARKER}"
+        if self.cached:
+            summary += " cached=true"
+        if self.truncated:
+            summary += " truncated=true (refine the query, e.g. aggregate or add LIMIT)"
+        return "\n".join([summary, "\t".join(self.columns), *self.rows])
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(row) + 1 for row in self.rows) + sum(len(name) + 1 for name in self.columns)
+
+# SQLite may read "..." as a string literal, so quoted identifiers are kept verbatim too
+_QUOTED_SPAN = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\])""")
+
+def normalize_sql(query: str) -> str:
+    """Collapse whitespace and case outside quoted spans so equivalent SQL shares a cache key."""
+    parts = _QUOTED_SPAN.split(query.strip().rstrip(";").strip())
+    return "".join(
+        part if i % 2 else re.sub(r"\s+", " ", part).lower()
+        for i, part in enumerate(parts)
+    )
+
+class QueryResultCache:
+    """LRU cache of query results, dropped whenever the database changes."""
+
+    def __init__(self, database: str, max_entries: int = 128, max_bytes: int = 8 * 1024 * 1024,
+                 on_change: Optional[Callable[[], None]] = None):
+        self.database = database
+        self.on_change = on_change
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, int, int], QueryResult]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._probe: Optional[sqlite3.Connection] = None
+        self._probe_file = None
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _current_version(self) -> Tuple:
+        # data_version changes when another connection commits, mtime/size
+        # catch the file being rewritten outside SQLite, inode catches it being replaced
+        try:
+            stat = os.stat(self.database)
+            file_identity = (stat.st_dev, stat.st_ino)
+            file_version = (file_identity, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            file_identity = file_version = None
+        if self._probe is not None and file_identity != self._probe_file:
+            self._probe.close()
+            self._probe = None
+        try:
+            if self._probe is None:
+                self._probe_file = file_identity
+                self._probe = sqlite3.connect(
+                    f"file:{self.database}?mode=ro", uri=True, check_same_thread=False
+                )
+            data_version = self._probe.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            self._probe = None
+            data_version = None
+        return file_version, data_version
+
+    def _check_version(self):
+        version = self._current_version()
+        if version != self._version:
+            changed = self._version is not None
+            if self._entries:
+                self.invalidations += 1
+                logging.info("Database changed, clearing SQL result cache")
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+            # Pooled connections may still hold the old file open
+            if changed and self.on_change:
+                self.on_change()
+
+    def get(self, key: Tuple[str, int, int]) -> Optional[QueryResult]:
+        with self._lock:
+            self._check_version()
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def current_version(self) -> Optional[Tuple]:
+        """Re-read the database version (clearing the cache if it changed) and return it."""
+        with self._lock:
+            self._check_version()
+            return self._version
+
+    @property
+    def version(self) -> Optional[Tuple]:
+        with self._lock:
+            return self._version
+
+    def put(self, key: Tuple[str, int, int], result: QueryResult, version: Optional[Tuple] = None):
+        """Store a result computed under `version`; it is dropped if the database changed since."""
+        size = result.size_bytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._check_version()
+            if version is not None and version != self._version:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size_bytes
+            self._entries[key] = result
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size_bytes
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+    def close(self):
+        with self._lock:
+            if self._probe is not None:
+                self._probe.close()
+                self._probe = None
+
+result_cache = QueryResultCache(DATABASE_PATH, RESULT_CACHE_ENTRIES, RESULT_CACHE_BYTES,
+                                on_change=db_pool.recycle)
+index_advisor = IndexAdvisor()
+
+def _fetch_capped(conn: sqlite3.Connection, query: str, max_rows: int,
+                  max_bytes: int) -> Tuple[QueryResult, float]:
+    if EXPLAIN_QUERIES:
+        index_advisor.explain(conn, query)
+    started = time.perf_counter()
+    cursor = conn.execute(query)
+    column_names = [description[0] for description in cursor.description or ()]
+    result = QueryResult(columns=column_names)
+    size = sum(len(name) + 1 for name in column_names)
+
+    # Stream in batches and stop as soon as either cap is reached
+    while not result.truncated:
+        batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+        if not batch:
+            break
+        for line in _serialize_batch(batch):
+            if result.row_count >= max_rows or size + len(line) + 1 > max_bytes:
+                result.truncated = True
+                break
+            result.rows.append(line)
+            size += len(line) + 1
+    cursor.close()
+    return result, time.perf_counter() - started
+
+def execute_sql_query(query: str, max_rows: int = MAX_RESULT_ROWS,
+                      max_bytes: int = MAX_RESULT_BYTES, deadline: Optional[float] = None) -> QueryResult:
+    logging.info("Executing SQL query: %s", query)
+    cache_key = (normalize_sql(query), max_rows, max_bytes)
+    cached = result_cache.get(cache_key)
+    cache_version = result_cache.version
+    if cached is not None:
+        logging.info("Query served from cache (%d results)", cached.row_count,
+                     extra={"rows": cached.row_count, "cached": True})
+        return replace(cached, cached=True)
 
-def execute_sql_query(query: str) -> list:
-    logging.info(f"Executing SQL query: {query}")
     try:
-        conn = sqlite3.connect('database.sqlite')
-        cursor = conn.cursor()
-        cursor.execute(query)
-        results = cursor.fetchall()
-        column_names = [description[0] for description in cursor.description]
-        conn.close()
-        logging.info(f"Query returned {len(results)} results")
-        return [dict(zip(column_names, row)) for row in results]
+        with db_pool.connection() as conn:
+            if deadline is not None:
+                # Aborts the statement with "interrupted" once the time.monotonic() deadline passes
+                conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_CHECK_INTERVAL)
+            try:
+                result, elapsed = _fetch_capped(conn, query, max_rows, max_bytes)
+            finally:
+                if deadline is not None:
+                    conn.set_progress_handler(None, 0)
+        db_pool.record_query(elapsed)
+        result.elapsed_ms = elapsed * 1000
+        logging.info(
+            "Query returned %d results in %.1f ms%s",
+            result.row_count, result.elapsed_ms, " (truncated)" if result.truncated else "",
+            extra={"rows": result.row_count, "elapsed_ms": round(result.elapsed_ms, 3),
+                   "truncated": result.truncated}
+        )
+        result_cache.put(cache_key, result, cache_version)
+        return result
     except Exception as e:
-        logging.error(f"SQL query failed: {str(e)}")
+        logging.error("SQL query failed: %s", e)
         raise
 
 class SQLQuery(BaseModel):
@@ -75,53 +492,135 @@ CREATE TABLE "Salaries" (
 
 """
 
-def get_agent_response(user_input: str) -> str:
-    logging.info(f"Received user input: {user_input}")
+_system_prompt_lock = threading.Lock()
+_system_prompt_cache: Tuple[Optional[Tuple], str] = (None, SYSTEM_PROMPT)
+
+def get_system_prompt() -> str:
+    """SYSTEM_PROMPT plus the summary tables, re-checked whenever the database changes."""
+    global _system_prompt_cache
+    version = result_cache.current_version()
+    with _system_prompt_lock:
+        cached_version, prompt = _system_prompt_cache
+        if cached_version == version and version is not None:
+            return prompt
+        try:
+            with db_pool.connection() as conn:
+                prompt = SYSTEM_PROMPT + describe_summary_tables(conn)
+        except sqlite3.Error as e:
+            logging.warning("Could not read summary tables: %s", e)
+            prompt = SYSTEM_PROMPT
+        _system_prompt_cache = (version, prompt)
+        return prompt
+
+tool_executor = ThreadPoolExecutor(max_workers=db_pool.size, thread_name_prefix="sql-tool")
+
+def _run_tool_call(tool_call, deadline: Optional[float] = None) -> str:
+    """Execute one tool call; errors are returned to the model instead of aborting the turn."""
+    try:
+        query = json.loads(tool_call.function.arguments)["query"]
+        return execute_sql_query(query, deadline=deadline).to_tsv()
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+def get_agent_response(user_input: str, max_steps: int = AGENT_MAX_STEPS,
+                       time_budget: float = AGENT_TIME_BUDGET) -> str:
+    logging.info("Received user input: %s", user_input)
     messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "system", "content": get_system_prompt()},
         {"role": "user", "content": user_input}
     ]
+    started = time.perf_counter()
+    reserve = min(AGENT_FINAL_RESERVE, time_budget / 4)
+    # time.monotonic() deadlines for the tool-calling steps and for the whole turn
+    final_deadline = time.monotonic() + time_budget
+    steps_deadline = final_deadline - reserve
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=messages,
-            tools=[sql_tool],
-            tool_choice="auto"
-        )
-        logging.info("Received initial OpenAI response")
-        
-        if response.choices[0].message.tool_calls:
-            tool_call = response.choices[0].message.tool_calls[0]
-            query = json.loads(tool_call.function.arguments)["query"]
-            logging.info(f"Function call detected: {tool_call.function.name}")
-            query_result = execute_sql_query(query)
-            
-            messages.extend([
-                {
-                    "role": "assistant",
-                    "content": None,
-                    "tool_calls": [tool_call]
-                },
-                {
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "content": str(query_result)
-                }
-            ])
-            
-            final_response = client.chat.completions.create(
+        for step in range(1, max_steps + 1):
+            step_started = time.perf_counter()
+            if time.monotonic() >= steps_deadline:
+                logging.info("Time budget of %.0fs exhausted before step %d", time_budget, step)
+                break
+            try:
+                response = client.chat_completion(
+                    model="gpt-4",
+                    messages=messages,
+                    tools=[sql_tool],
+                    tool_choice="auto",
+                    deadline=steps_deadline
+                )
+            except DeadlineExceeded as e:
+                logging.info("Time budget of %.0fs exhausted during step %d: %s", time_budget, step, e)
+                break
+            llm_elapsed = time.perf_counter() - step_started
+            message = response.choices[0].message
+
+            if not message.tool_calls:
+                logging.info(
+                    "Step %d: final answer after %.0f ms LLM wait", step, llm_elapsed * 1000,
+                    extra={"step": step, "llm_ms": round(llm_elapsed * 1000, 3)}
+                )
+                return message.content
+
+            logging.info("Step %d: %d tool call(s)", step, len(message.tool_calls))
+            # All calls in one response run concurrently against the pool
+            tool_started = time.perf_counter()
+            outputs = list(tool_executor.map(
+                _run_tool_call, message.tool_calls, [steps_deadline] * len(message.tool_calls)
+            ))
+            tool_elapsed = time.perf_counter() - tool_started
+
+            messages.append({
+                "role": "assistant",
+                "content": message.content,
+                "tool_calls": message.tool_calls
+            })
+            messages.extend(
+                {"role": "tool", "tool_call_id": tool_call.id, "content": output}
+                for tool_call, output in zip(message.tool_calls, outputs)
+            )
+            step_elapsed = time.perf_counter() - step_started
+            logging.info(
+                "Step %d: LLM %.0f ms, tools %.0f ms, total %.0f ms",
+                step, llm_elapsed * 1000, tool_elapsed * 1000, step_elapsed * 1000,
+                extra={"step": step, "llm_ms": round(llm_elapsed * 1000, 3),
+                       "tool_ms": round(tool_elapsed * 1000, 3), "step_ms": round(step_elapsed * 1000, 3)}
+            )
+
+        # Out of steps or time: ask for an answer from what has been gathered so far
+        try:
+            final_response = client.chat_completion(
                 model="gpt-4",
-                messages=messages
+                messages=messages,
+                tools=[sql_tool],
+                tool_choice="none",
+                deadline=final_deadline
             )
-            logging.info("Received final OpenAI response")
-            return final_response.choices[0].message.content
-        
-        return response.choices[0].message.content
+        except DeadlineExceeded:
+            logging.warning("Time budget of %.0fs exhausted before the final answer", time_budget)
+            return "Sorry, answering this question took too long. Please try a narrower question."
+        total_elapsed = time.perf_counter() - started
+        logging.info("Received final OpenAI response after %.1fs", total_elapsed,
+                     extra={"total_ms": round(total_elapsed * 1000, 3)})
+        return final_response.choices[0].message.content
     except Exception as e:
-        logging.error(f"Error in get_agent_response: {str(e)}")
+        logging.error("Error in get_agent_response: %s", e)
         return f"An error occurred: {str(e)}"
 
+def refresh_summaries_on_exit():
+    """Rebuild summary tables that writes to Salaries made stale during the session."""
+    if not REFRESH_STALE_SUMMARIES:
+        return
+    try:
+        conn = sqlite3.connect(DATABASE_PATH)
+        try:
+            if refresh_stale_summary_tables(conn):
+                logging.info("Rebuilt stale summary tables")
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logging.warning("Could not refresh summary tables: %s", e)
+
 def main():
     logging.info("Starting the agent")
     while True:
@@ -133,6 +632,18 @@ def main():
         response = get_agent_response(user_input)
         print("\nResponse:", response)
     
+    logging.info("Connection pool stats: %s", db_pool.stats())
+    logging.info("SQL result cache stats: %s", result_cache.stats())
+    logging.info("Index advisor stats: %s", index_advisor.stats())
+    logging.info("OpenAI usage: %s", client.usage.summary())
+    with db_pool.connection() as conn:
+        for statement in index_advisor.recommend(conn):
+            logging.info("Recommended index: %s", statement)
+    index_advisor.save()
+    refresh_summaries_on_exit()
+    result_cache.close()
+    tool_executor.shutdown()
+    db_pool.close()
     logging.info("Shutting down the agent")
 
 if __name__ == "__main__":
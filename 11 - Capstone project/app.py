@@ -1,17 +1,20 @@
 import streamlit as st
 import json
 import logging
+import os
+import sys
+import time
 import requests
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.logging_setup import setup_logging
+
+# Configure logging (queued, written by a background thread)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -53,7 +56,7 @@ class DatasourceService(BaseService):
     
     def process(self, query: str) -> str:
         """Query the local JSON datasource"""
-        logger.info(f"Querying datasource with: {query}")
+        logger.info("Querying datasource with: %s", query)
         try:
             results = self._load_and_search(query)
             if results:
@@ -64,22 +67,25 @@ class DatasourceService(BaseService):
                 return "\n\n".join(formatted_results)
             return "No relevant information found in the datasource."
         except Exception as e:
-            logger.error(f"Error querying datasource: {e}")
+            logger.error("Error querying datasource: %s", e)
             return "Error accessing datasource."
     
     def _load_and_search(self, query: str) -> List[Dict[str, Any]]:
         """Load JSON file and perform keyword search"""
+        started = time.perf_counter()
         try:
             with open(self.datasource_file, 'r') as f:
                 data = json.load(f)
             results = [item for item in data if query.lower() in str(item).lower()]
-            logger.info(f"Datasource returned {len(results)} results")
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            logger.info("Datasource returned %d results in %.1f ms", len(results), elapsed_ms,
+                        extra={"results": len(results), "elapsed_ms": round(elapsed_ms, 3)})
             return results[:config.MAX_RESULTS]
         except FileNotFoundError:
-            logger.error(f"Datasource file {self.datasource_file} not found")
+            logger.error("Datasource file %s not found", self.datasource_file)
             return []
         except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in datasource file: {e}")
+            logger.error("Invalid JSON in datasource file: %s", e)
             return []
     
     def _format_company_data(self, content: str) -> str:
@@ -104,7 +110,7 @@ class DatasourceService(BaseService):
             )
             return formatted
         except Exception as e:
-            logger.error(f"Error formatting company data: {e}")
+            logger.error("Error formatting company data: %s", e)
             return content
 
 class WeatherService(BaseService):
@@ -115,7 +121,7 @@ class WeatherService(BaseService):
     def process(self, query: str) -> str:
         """Get weather information for a city"""
         city = self._extract_city(query)
-        logger.info(f"Calling OpenWeatherMap API for city: {city}")
+        logger.info("Calling OpenWeatherMap API for city: %s", city)
         
         if self.api_key == "YOUR_OPENWEATHERMAP_API_KEY":
             return "Weather service not configured. Please add your OpenWeatherMap API key."
@@ -126,9 +132,11 @@ class WeatherService(BaseService):
                 'appid': self.api_key,
                 'units': 'metric'
             }
+            started = time.perf_counter()
             response = requests.get(self.base_url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
+            elapsed_ms = (time.perf_counter() - started) * 1000
             
             weather = (
                 f"Weather in {city}: {data['weather'][0]['description']}, "
@@ -136,13 +144,13 @@ class WeatherService(BaseService):
                 f"Humidity: {data['main']['humidity']}% | "
                 f"Wind: {data['wind']['speed']} m/s"
             )
-            logger.info(f"Weather API response: {weather}")
+            logger.info("Weather API response: %s", weather, extra={"elapsed_ms": round(elapsed_ms, 3)})
             return weather
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching weather: {e}")
+            logger.error("Error fetching weather: %s", e)
             return "Unable to fetch weather data. Please check your connection."
         except KeyError as e:
-            logger.error(f"Unexpected weather API response format: {e}")
+            logger.error("Unexpected weather API response format: %s", e)
             return "Unable to parse weather data."
     
     def _extract_city(self, query: str) -> str:
@@ -158,7 +166,7 @@ class NewsService(BaseService):
     def process(self, query: str) -> str:
         """Get news articles for a topic"""
         topic = self._extract_topic(query)
-        logger.info(f"Calling NewsAPI for topic: {topic}")
+        logger.info("Calling NewsAPI for topic: %s", topic)
         
         if self.api_key == "YOUR_NEWSAPI_KEY":
             return "News service not configured. Please add your NewsAPI key."
@@ -171,9 +179,11 @@ class NewsService(BaseService):
                 'sortBy': 'publishedAt',
                 'pageSize': config.MAX_RESULTS
             }
+            started = time.perf_counter()
             response = requests.get(self.base_url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
+            elapsed_ms = (time.perf_counter() - started) * 1000
             
             if data['status'] == 'ok' and data['articles']:
                 articles = data['articles'][:config.MAX_RESULTS]
@@ -184,16 +194,17 @@ class NewsService(BaseService):
                     published_at = article['publishedAt'][:10]  # Get date only
                     news_items.append(f"**{title}**\n*{source} - {published_at}*")
                 
-                logger.info(f"News API returned {len(news_items)} articles")
+                logger.info("News API returned %d articles", len(news_items),
+                            extra={"results": len(news_items), "elapsed_ms": round(elapsed_ms, 3)})
                 return "\n\n".join(news_items)
             else:
                 return f"No news articles found for topic: {topic}"
                 
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching news: {e}")
+            logger.error("Error fetching news: %s", e)
             return "Unable to fetch news data. Please check your connection."
         except KeyError as e:
-            logger.error(f"Unexpected news API response format: {e}")
+            logger.error("Unexpected news API response format: %s", e)
             return "Unable to parse news data."
     
     def _extract_topic(self, query: str) -> str:
@@ -210,7 +221,7 @@ class QueryProcessor:
     
     def process_query(self, query: str) -> str:
         """Process user query and return appropriate response"""
-        logger.info(f"Processing query: {query}")
+        logger.info("Processing query: %s", query)
         query_lower = query.lower().strip()
         
         try:
@@ -221,7 +232,7 @@ class QueryProcessor:
             else:
                 return self.datasource_service.process(query_lower)
         except Exception as e:
-            logger.error(f"Error processing query: {e}")
+            logger.error("Error processing query: %s", e)
             return "Sorry, I encountered an error processing your request."
 
 # UI Components
@@ -2,18 +2,20 @@ import streamlit as st
 import json
 import logging
 import requests
+import time
 from datetime import datetime
 from dotenv import load_dotenv
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.logging_setup import setup_logging
 
 load_dotenv()
 # api_key = os.getenv("OPENAI_API_KEY")
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Configure logging (queued, written by a background thread)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize session state for chat history
@@ -22,49 +24,57 @@ if 'chat_history' not in st.session_state:
 
 # Function to load and query datasource (JSON)
 def query_datasource(query):
-    logger.info(f"Querying datasource with: {query}")
+    logger.info("Querying datasource with: %s", query)
+    started = time.perf_counter()
     try:
         with open('data/companies.json', 'r') as f:
             data = json.load(f)
         # Simple keyword-based search in JSON
         results = [item for item in data if query.lower() in str(item).lower()]
-        logger.info(f"Datasource returned {len(results)} results")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info("Datasource returned %d results in %.1f ms", len(results), elapsed_ms,
+                    extra={"results": len(results), "elapsed_ms": round(elapsed_ms, 3)})
         return results[:2]  # Return up to 2 results
     except Exception as e:
-        logger.error(f"Error querying datasource: {e}")
+        logger.error("Error querying datasource: %s", e)
         return []
 
 # Function to call OpenWeatherMap API
 def get_weather(city):
     api_key = os.getenv("OPENAI_API_KEY") 
     url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
-    logger.info(f"Calling OpenWeatherMap API for city: {city}")
+    logger.info("Calling OpenWeatherMap API for city: %s", city)
     try:
+        started = time.perf_counter()
         response = requests.get(url)
         response.raise_for_status()
         data = response.json()
+        elapsed_ms = (time.perf_counter() - started) * 1000
         weather = f"Weather in {city}: {data['weather'][0]['description']}, {data['main']['temp']}°C"
-        logger.info(f"Weather API response: {weather}")
+        logger.info("Weather API response: %s", weather, extra={"elapsed_ms": round(elapsed_ms, 3)})
         return weather
     except Exception as e:
-        logger.error(f"Error fetching weather: {e}")
+        logger.error("Error fetching weather: %s", e)
         return "Unable to fetch weather data."
 
 # Function to call NewsAPI
 def get_news(topic):
     api_key = os.getenv("OPENAI_API_KEY")
     url = f"https://newsapi.org/v2/everything?q={topic}&apiKey={api_key}&language=en"
-    logger.info(f"Calling NewsAPI for topic: {topic}")
+    logger.info("Calling NewsAPI for topic: %s", topic)
     try:
+        started = time.perf_counter()
         response = requests.get(url)
         response.raise_for_status()
         data = response.json()
+        elapsed_ms = (time.perf_counter() - started) * 1000
         articles = data['articles'][:2]
         news = [f"{article['title']} - {article['source']['name']}" for article in articles]
-        logger.info(f"News API returned {len(news)} articles")
+        logger.info("News API returned %d articles", len(news),
+                    extra={"results": len(news), "elapsed_ms": round(elapsed_ms, 3)})
         return "\n".join(news)
     except Exception as e:
-        logger.error(f"Error fetching news: {e}")
+        logger.error("Error fetching news: %s", e)
         return "Unable to fetch news data."
 
 # Function to format company data for readable display
@@ -83,12 +93,12 @@ def format_company_data(content):
         )
         return formatted
     except Exception as e:
-        logger.error(f"Error formatting company data: {e}")
+        logger.error("Error formatting company data: %s", e)
         return content
 
 # Function to process user query
 def process_query(query):
-    logger.info(f"Processing query: {query}")
+    logger.info("Processing query: %s", query)
     query = query.lower().strip()
 
     if "weather" in query:
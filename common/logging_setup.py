@@ -0,0 +1,98 @@
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_lock = threading.Lock()
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra` fields such as timings."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class SnapshotQueueHandler(QueueHandler):
+    """Merge `%` arguments into the message in the caller, leave the rest to the listener.
+
+    Arguments are rendered before the record is queued, so later mutation by the
+    caller cannot change what is logged. Unlike the stock QueueHandler this keeps
+    exc_info, letting the listener's formatter render exceptions itself.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+def setup_logging(level: Optional[str] = None, log_file: Optional[str] = None,
+                  json_format: Optional[bool] = None) -> QueueListener:
+    """Route all logging through a background QueueListener; only the first call configures it.
+
+    Args:
+        level (str, optional): Root level, defaults to LOG_LEVEL or INFO
+        log_file (str, optional): Also write records to this file
+        json_format (bool, optional): JSON lines instead of plain text, defaults to LOG_FORMAT=json
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        if json_format is None:
+            json_format = os.getenv("LOG_FORMAT", "json").lower() == "json"
+        formatter = JsonFormatter() if json_format else logging.Formatter(
+            '%(asctime)s - %(levelname)s - %(message)s'
+        )
+
+        handlers: List[logging.Handler] = [logging.StreamHandler(sys.stderr)]
+        if log_file:
+            handlers.append(logging.FileHandler(log_file))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(SnapshotQueueHandler(log_queue))
+        root.setLevel(level or os.getenv("LOG_LEVEL", "INFO"))
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,356 @@
+import os
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import openai
+from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RPM = int(os.getenv("OPENAI_RPM", "500"))
+DEFAULT_TPM = int(os.getenv("OPENAI_TPM", "200000"))
+DEFAULT_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+DEFAULT_POOL_SIZE = int(os.getenv("OPENAI_POOL_SIZE", "20"))
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError
+)
+
+class DeadlineExceeded(TimeoutError):
+    """The caller's deadline passed while waiting for the rate limiter or retrying."""
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most `capacity` units per minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Reserve `amount` if available and return 0, otherwise the seconds to wait."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        """Take tokens without waiting; the balance may go negative to repay underestimates."""
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+
+    def refund(self, amount: float):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+class RateLimiter:
+    """Requests-per-minute plus tokens-per-minute limits shared by every caller."""
+
+    def __init__(self, requests_per_minute: int = DEFAULT_RPM, tokens_per_minute: int = DEFAULT_TPM):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, estimated_tokens: int = 0, deadline: Optional[float] = None) -> float:
+        """Block until one request and `estimated_tokens` fit; returns seconds spent waiting.
+
+        Raises DeadlineExceeded instead of sleeping past `deadline` (a time.monotonic() value).
+        """
+        waited = 0.0
+        while True:
+            delay = self.requests.wait_time(1)
+            if delay == 0.0:
+                delay = self.tokens.wait_time(estimated_tokens) if estimated_tokens else 0.0
+                if delay == 0.0:
+                    return waited
+                self.requests.refund(1)
+            if deadline is not None and time.monotonic() + delay > deadline:
+                raise DeadlineExceeded(f"rate limit wait of {delay:.2f}s exceeds the deadline")
+            time.sleep(delay)
+            waited += delay
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int):
+        """Correct the token bucket once the real usage is known."""
+        if actual_tokens > estimated_tokens:
+            self.tokens.consume(actual_tokens - estimated_tokens)
+        elif actual_tokens < estimated_tokens:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+@dataclass
+class CallRecord:
+    operation: str
+    model: Optional[str]
+    latency: float
+    attempts: int
+    throttled: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Set instead of the real counts when the response carried no usage
+    estimated_tokens: int = 0
+    error: Optional[str] = None
+
+@dataclass
+class UsageStats:
+    records: List[CallRecord] = field(default_factory=list)
+    max_records: int = 10000
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, record: CallRecord):
+        with self._lock:
+            self.records.append(record)
+            if len(self.records) > self.max_records:
+                del self.records[:len(self.records) - self.max_records]
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            records = list(self.records)
+        calls = len(records)
+        latencies = sorted(record.latency for record in records)
+        return {
+            "calls": calls,
+            "errors": sum(1 for record in records if record.error),
+            "retries": sum(record.attempts - 1 for record in records),
+            "throttled_seconds": round(sum(record.throttled for record in records), 3),
+            "prompt_tokens": sum(record.prompt_tokens for record in records),
+            "completion_tokens": sum(record.completion_tokens for record in records),
+            "estimated_tokens": sum(record.estimated_tokens for record in records),
+            "avg_latency_ms": round(sum(latencies) / calls * 1000, 1) if calls else 0.0,
+            "p95_latency_ms": round(latencies[int(0.95 * (calls - 1))] * 1000, 1) if calls else 0.0
+        }
+
+def estimate_tokens(messages: Optional[List[Any]] = None, prompt: Optional[str] = None,
+                    max_tokens: Optional[int] = None) -> int:
+    """Cheap upper-bound style estimate (~4 characters per token) used for TPM throttling."""
+    chars = len(prompt or "")
+    for message in messages or []:
+        content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+        chars += len(content or "") if isinstance(content, str) else 0
+    return chars // 4 + (max_tokens or 256)
+
+def response_usage(response: Any) -> Optional[Tuple[int, int]]:
+    """(prompt, completion) tokens from an SDK response or a LangChain ChatResult."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        llm_output = getattr(response, "llm_output", None) or {}
+        usage = llm_output.get("token_usage")
+    if not usage:
+        return None
+    if isinstance(usage, dict):
+        return usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+    return getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read Retry-After (or retry-after-ms) from an API error response, if present."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+class SharedOpenAIClient:
+    """Pooled OpenAI client with rate limiting, retries and usage accounting."""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 rate_limiter: Optional[RateLimiter] = None, max_retries: int = DEFAULT_MAX_RETRIES,
+                 pool_size: int = DEFAULT_POOL_SIZE, timeout: float = 60.0,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0):
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=timeout
+        )
+        # Retries are handled here so they also respect the shared rate limiter
+        self.raw = OpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            base_url=base_url or os.getenv("OPENAI_BASE_URL"),
+            http_client=self.http_client,
+            max_retries=0
+        )
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.usage = UsageStats()
+
+    def call(self, operation: str, func: Callable[..., Any], estimated_tokens: int = 0,
+             deadline: Optional[float] = None, **kwargs) -> Any:
+        """Run an API call under the rate limiter, retrying transient failures with backoff.
+
+        With a `deadline` (a time.monotonic() value) each attempt's timeout is cut to
+        the time left, and DeadlineExceeded is raised rather than waiting past it.
+        """
+        started = time.perf_counter()
+        throttled = 0.0
+        attempt = 0
+        timeout = kwargs.get("timeout")
+        while True:
+            attempt += 1
+            try:
+                throttled += self.rate_limiter.acquire(estimated_tokens, deadline)
+            except DeadlineExceeded as e:
+                self._record(operation, kwargs, started, attempt, throttled, error=str(e))
+                raise
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    error = DeadlineExceeded(f"{operation} deadline exceeded")
+                    self._record(operation, kwargs, started, attempt, throttled, error=str(error))
+                    raise error
+                kwargs["timeout"] = min(timeout, remaining) if timeout else remaining
+            try:
+                response = func(**kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt > self.max_retries:
+                    self._record(operation, kwargs, started, attempt, throttled, error=str(e))
+                    raise
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+                    delay *= random.uniform(0.5, 1.0)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    error = DeadlineExceeded(f"{operation} deadline exceeded ({type(e).__name__})")
+                    self._record(operation, kwargs, started, attempt, throttled, error=str(error))
+                    raise error from e
+                logger.warning(
+                    "%s failed (%s), retry %d/%d in %.2fs",
+                    operation, type(e).__name__, attempt, self.max_retries, delay
+                )
+                time.sleep(delay)
+                continue
+            except Exception as e:
+                self._record(operation, kwargs, started, attempt, throttled, error=str(e))
+                raise
+
+            usage = response_usage(response)
+            if usage is None:
+                self._record(operation, kwargs, started, attempt, throttled,
+                             estimated_tokens=estimated_tokens)
+                return response
+            prompt_tokens, completion_tokens = usage
+            if estimated_tokens:
+                self.rate_limiter.reconcile(estimated_tokens, prompt_tokens + completion_tokens)
+            self._record(operation, kwargs, started, attempt, throttled,
+                         prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+            return response
+
+    def _record(self, operation: str, kwargs: dict, started: float, attempts: int,
+                throttled: float, **extra):
+        record = CallRecord(
+            operation=operation,
+            model=kwargs.get("model"),
+            latency=time.perf_counter() - started,
+            attempts=attempts,
+            throttled=throttled,
+            **extra
+        )
+        self.usage.add(record)
+        logger.debug("OpenAI call: %s", record)
+
+    def chat_completion(self, deadline: Optional[float] = None, **kwargs) -> Any:
+        estimated = estimate_tokens(kwargs.get("messages"), max_tokens=kwargs.get("max_tokens"))
+        return self.call("chat.completions", self.raw.chat.completions.create, estimated,
+                         deadline=deadline, **kwargs)
+
+    def generate_image(self, deadline: Optional[float] = None, **kwargs) -> Any:
+        return self.call("images.generate", self.raw.images.generate, deadline=deadline, **kwargs)
+
+    def close(self):
+        self.http_client.close()
+
+_shared_client: Optional[SharedOpenAIClient] = None
+_shared_lock = threading.Lock()
+
+def get_client(**kwargs) -> SharedOpenAIClient:
+    """Process-wide client; keyword arguments only apply on first use."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = SharedOpenAIClient(**kwargs)
+        return _shared_client
+
+def get_chat_model(**kwargs):
+    """LangChain ChatOpenAI whose requests go through SharedOpenAIClient.call().
+
+    That gives chat calls the same request and token throttling, retries with
+    Retry-After backoff and usage accounting as chat_completion(); the SDK's own
+    retries are turned off so they cannot bypass the limiter.
+    """
+    from langchain_openai import ChatOpenAI
+
+    shared = get_client()
+
+    class SharedChatOpenAI(ChatOpenAI):
+        def _generate(self, messages: List[Any], stop: Optional[List[str]] = None,
+                      run_manager: Any = None, **kwargs) -> Any:
+            parent = super()
+            estimated = estimate_tokens(messages, max_tokens=self.max_tokens)
+            # `model` matches the request default; passing it lets the call be recorded per model
+            return shared.call(
+                "chat.completions",
+                lambda **request: parent._generate(messages, stop=stop, run_manager=run_manager, **request),
+                estimated, model=self.model_name, **kwargs
+            )
+
+    kwargs.setdefault("http_client", shared.http_client)
+    kwargs["max_retries"] = 0
+    return SharedChatOpenAI(**kwargs)
+
+def get_embeddings(**kwargs):
+    """LangChain OpenAIEmbeddings whose requests go through SharedOpenAIClient.call().
+
+    The embeddings API usage is not exposed by LangChain, so calls are recorded
+    with their chars/4 estimate as `estimated_tokens`.
+    """
+    from langchain_openai import OpenAIEmbeddings
+
+    shared = get_client()
+
+    class SharedOpenAIEmbeddings(OpenAIEmbeddings):
+        def _embed(self, texts: List[str], embed: Callable[[List[str]], Any]) -> Any:
+            estimated = sum(len(text) for text in texts) // 4 + 1
+            return shared.call("embeddings", lambda model: embed(texts), estimated, model=self.model)
+
+        def embed_documents(self, texts: List[str], chunk_size: Optional[int] = None,
+                            **kwargs) -> List[List[float]]:
+            # One limiter slot per request the parent class will send
+            size = chunk_size or self.chunk_size
+            parent = super()
+            embeddings: List[List[float]] = []
+            for start in range(0, len(texts), size):
+                embeddings.extend(self._embed(
+                    texts[start:start + size],
+                    lambda batch: parent.embed_documents(batch, chunk_size=size, **kwargs)
+                ))
+            return embeddings
+
+        def embed_query(self, text: str, **kwargs) -> List[float]:
+            parent = super()
+            return self._embed([text], lambda batch: parent.embed_query(batch[0], **kwargs))
+
+    kwargs.setdefault("http_client", shared.http_client)
+    kwargs["max_retries"] = 0
+    return SharedOpenAIEmbeddings(**kwargs)